@@ -1,12 +1,12 @@
 import json
-from typing import Type, List, Dict, Any, Optional
+from typing import Type, List, Dict, Any, Optional, Tuple, Iterator, Iterable, Literal
 from pydantic import BaseModel, Field
 from crewai.tools import BaseTool
 import os
 import logging
 import re
-import functools
-from collections import Counter
+import bisect
+from collections import Counter, defaultdict
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -14,7 +14,11 @@ logger = logging.getLogger(__name__)
 # Define the input schema for the tool
 class ConversationQueryToolInput(BaseModel):
     """Input for ConversationQueryTool."""
-    query: str = Field(..., description="The search query or keywords to find relevant conversations or guidelines. Specify if you're looking for 'guidelines' or 'conversations' if relevant.")
+    query: str = Field(..., description="The search query or keywords to find relevant conversations or guidelines. Use 'entry_type' to restrict results to guidelines or conversation examples.")
+    entry_type: Optional[Literal["guideline", "conversation_example"]] = Field(None, description="Optional filter restricting results to one entry type: 'guideline' or 'conversation_example'.")
+    language: Optional[str] = Field(None, description="Optional filter restricting results to a language code, e.g. 'en'.")
+    tags: Optional[List[str]] = Field(None, description="Optional filter restricting results to entries carrying all of the given tags, e.g. ['billing', 'refund'].")
+    id_prefix: Optional[str] = Field(None, description="Optional filter restricting results to entries whose ID starts with this prefix, e.g. 'conv_en'.")
 
 class ConversationQueryTool(BaseTool):
     name: str = "Knowledge Base Query Tool"
@@ -27,11 +31,24 @@ class ConversationQueryTool(BaseTool):
     knowledge_base: List[Dict[str, Any]] = []
     
     # Cache to store previous query results
-    _query_cache: Dict[str, List[Dict[str, Any]]] = {}
+    _query_cache: Dict[Tuple, List[Dict[str, Any]]] = {}
     
     # Maximum cache size
     _MAX_CACHE_SIZE: int = 100
 
+    # Sub-indexes mapping a field value to a bitset of entry positions
+    _type_index: Dict[str, int] = {}
+    _language_index: Dict[str, int] = {}
+    _tag_index: Dict[str, int] = {}
+
+    # Lowercased entry IDs in sorted order, with their knowledge base positions
+    _id_keys: List[str] = []
+    _id_positions: List[int] = []
+
+    # The knowledge base list, and its length, the sub-indexes were built from
+    _indexed_entries: Optional[List[Dict[str, Any]]] = None
+    _indexed_size: int = 0
+
     def __init__(self, dataset_path: str = "data/sample_conversations.json", cache_size: int = 100, **kwargs):
         """
         Initialize the ConversationQueryTool.
@@ -74,8 +91,15 @@ class ConversationQueryTool(BaseTool):
             logger.info(f"Attempting to load dataset from: {dataset_path}")
             
             with open(dataset_path, 'r', encoding='utf-8') as f:
-                self.knowledge_base = json.load(f)
+                data = json.load(f)
+
+            # The dataset must be a list of entry objects
+            if isinstance(data, list) and all(isinstance(entry, dict) for entry in data):
+                self.knowledge_base = data
                 logger.info(f"Successfully loaded {len(self.knowledge_base)} entries from dataset")
+            else:
+                logger.error(f"Dataset at {dataset_path} is not a list of entry objects")
+                self.knowledge_base = []
                 
         except FileNotFoundError:
             logger.error(f"Dataset file not found at {dataset_path}")
@@ -87,6 +111,189 @@ class ConversationQueryTool(BaseTool):
             logger.error(f"Error loading dataset: {str(e)}")
             self.knowledge_base = []
 
+        # Rebuild on every path so the indexes never drift from the data
+        self._build_indexes()
+
+    def _refresh_indexes(self) -> None:
+        """
+        Rebuild the indexes (and drop stale cached results) if knowledge_base
+        was reassigned, or had entries added or removed, since they were built.
+        """
+        if (
+            self._indexed_entries is not self.knowledge_base
+            or self._indexed_size != len(self.knowledge_base)
+        ):
+            self._build_indexes()
+
+    def _build_indexes(self) -> None:
+        """
+        Build the per-type, per-language and per-tag sub-indexes.
+
+        Each index maps a lowercased field value to an integer bitset in which
+        bit i is set when knowledge_base[i] carries that value. Entry IDs are
+        also kept in sorted order so ID prefixes can be looked up by bisection.
+        Cached query results are discarded since they may refer to the previous data.
+        """
+        self._query_cache = {}
+        self._indexed_entries = self.knowledge_base
+        self._indexed_size = len(self.knowledge_base)
+
+        # Collect positions per key first; each list becomes a bitset once
+        type_positions: Dict[str, List[int]] = defaultdict(list)
+        language_positions: Dict[str, List[int]] = defaultdict(list)
+        tag_positions: Dict[str, List[int]] = defaultdict(list)
+        id_entries: List[Tuple[str, int]] = []
+
+        for position, entry in enumerate(self.knowledge_base):
+            if not isinstance(entry, dict):
+                continue
+
+            entry_id = entry.get('id')
+            if isinstance(entry_id, str):
+                id_entries.append((entry_id.lower(), position))
+
+            entry_type = entry.get('type')
+            if isinstance(entry_type, str):
+                type_positions[entry_type.lower()].append(position)
+
+            language = entry.get('language')
+            if isinstance(language, str):
+                language_positions[language.lower()].append(position)
+
+            tags = entry.get('tags')
+            if isinstance(tags, list):
+                for tag in tags:
+                    if isinstance(tag, str):
+                        tag_positions[tag.lower()].append(position)
+
+        self._type_index = {key: self._positions_to_bitset(positions) for key, positions in type_positions.items()}
+        self._language_index = {key: self._positions_to_bitset(positions) for key, positions in language_positions.items()}
+        self._tag_index = {key: self._positions_to_bitset(positions) for key, positions in tag_positions.items()}
+
+        id_entries.sort()
+        self._id_keys = [entry_id for entry_id, _ in id_entries]
+        self._id_positions = [position for _, position in id_entries]
+
+        logger.info(
+            f"Built sub-indexes: {len(self._type_index)} types, "
+            f"{len(self._language_index)} languages, {len(self._tag_index)} tags"
+        )
+
+    def _id_prefix_bitset(self, id_prefix: str) -> int:
+        """
+        Get the bitset of entries whose ID starts with the given prefix (case-insensitive).
+
+        Args:
+            id_prefix (str): The ID prefix to match
+
+        Returns:
+            int: Bitset of matching entry positions
+        """
+        id_prefix = id_prefix.lower()
+
+        # IDs sharing the prefix form a contiguous run in the sorted list
+        positions = []
+        index = bisect.bisect_left(self._id_keys, id_prefix)
+        while index < len(self._id_keys) and self._id_keys[index].startswith(id_prefix):
+            positions.append(self._id_positions[index])
+            index += 1
+        return self._positions_to_bitset(positions)
+
+    def _positions_to_bitset(self, positions: List[int]) -> int:
+        """
+        Convert a list of entry positions into an integer bitset.
+
+        The bits are set in a byte buffer and converted to an int in one step,
+        so the cost is linear in the corpus size rather than per position.
+
+        Args:
+            positions (List[int]): Positions of entries in the knowledge base
+
+        Returns:
+            int: Bitset with bit i set for every position i
+        """
+        buffer = bytearray((len(self.knowledge_base) + 7) // 8)
+        for position in positions:
+            buffer[position >> 3] |= 1 << (position & 7)
+        return int.from_bytes(buffer, 'little')
+
+    def _normalize_filters(
+        self,
+        entry_type: Optional[str] = None,
+        language: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+        id_prefix: Optional[str] = None,
+    ) -> Tuple[Optional[str], Optional[str], Tuple[str, ...], Optional[str]]:
+        """
+        Normalize the structured filters the same way they are matched.
+
+        Matching ignores case and tag order, so equivalent filters are reduced
+        to one canonical form and share a single query cache slot.
+
+        Args:
+            entry_type (Optional[str]): Entry type to restrict to
+            language (Optional[str]): Language code to restrict to
+            tags (Optional[Iterable[str]]): Tags that every candidate must carry
+            id_prefix (Optional[str]): ID prefix to restrict to
+
+        Returns:
+            Tuple: Lowercased entry type, language and ID prefix (None when unset),
+            and a sorted tuple of unique lowercased tags
+        """
+        return (
+            entry_type.lower() if entry_type else None,
+            language.lower() if language else None,
+            tuple(sorted({tag.lower() for tag in tags})) if tags else (),
+            id_prefix.lower() if id_prefix else None,
+        )
+
+    def _filter_mask(
+        self,
+        entry_type: Optional[str] = None,
+        language: Optional[str] = None,
+        tags: Tuple[str, ...] = (),
+        id_prefix: Optional[str] = None,
+    ) -> int:
+        """
+        Combine the structured filters into a single bitset of candidate entries.
+
+        Args:
+            entry_type (Optional[str]): Entry type to restrict to
+            language (Optional[str]): Language code to restrict to
+            tags (Tuple[str, ...]): Tags that every candidate must carry
+            id_prefix (Optional[str]): ID prefix to restrict to
+
+        Returns:
+            int: Bitset of entry positions matching all filters
+        """
+        mask = (1 << len(self.knowledge_base)) - 1
+
+        if entry_type:
+            mask &= self._type_index.get(entry_type.lower(), 0)
+        if language:
+            mask &= self._language_index.get(language.lower(), 0)
+        for tag in tags:
+            mask &= self._tag_index.get(tag.lower(), 0)
+        if id_prefix:
+            mask &= self._id_prefix_bitset(id_prefix)
+
+        return mask
+
+    def _iter_mask(self, mask: int) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the knowledge base entries whose bits are set in the mask.
+
+        Args:
+            mask (int): Bitset of entry positions
+
+        Yields:
+            Dict[str, Any]: The matching knowledge base entries, in dataset order
+        """
+        # Walk the binary digits once, lowest bit first, so the cost stays linear
+        for position, bit in enumerate(reversed(bin(mask)[2:])):
+            if bit == '1':
+                yield self.knowledge_base[position]
+
     def _preprocess_query(self, query: str) -> str:
         """
         Preprocess the query for better matching.
@@ -195,21 +402,38 @@ class ConversationQueryTool(BaseTool):
             
         return score + type_boost
 
-    @functools.lru_cache(maxsize=100)
-    def _search_knowledge_base(self, query: str) -> List[Dict[str, Any]]:
+    def _search_knowledge_base(
+        self,
+        query: str,
+        entry_type: Optional[str] = None,
+        language: Optional[str] = None,
+        tags: Tuple[str, ...] = (),
+        id_prefix: Optional[str] = None,
+        candidate_mask: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Search the knowledge base for entries matching the query.
         
         Args:
             query (str): The preprocessed search query
+            entry_type (Optional[str]): Entry type to restrict results to
+            language (Optional[str]): Language code to restrict results to
+            tags (Tuple[str, ...]): Tags that every result must carry
+            id_prefix (Optional[str]): ID prefix to restrict results to
+            candidate_mask (Optional[int]): Bitset for these filters, if the caller already computed it
             
         Returns:
             List[Dict[str, Any]]: List of matching entries sorted by relevance
         """
+        self._refresh_indexes()
+
+        entry_type, language, tags, id_prefix = self._normalize_filters(entry_type, language, tags, id_prefix)
+        cache_key = (query, entry_type, language, tags, id_prefix)
+
         # Check if query is in cache
-        if query in self._query_cache:
-            logger.info(f"Query cache hit for: {query}")
-            return self._query_cache[query]
+        if cache_key in self._query_cache:
+            logger.info(f"Query cache hit for: {cache_key}")
+            return self._query_cache[cache_key]
             
         if not self.knowledge_base:
             logger.warning("Knowledge base is empty")
@@ -217,10 +441,18 @@ class ConversationQueryTool(BaseTool):
             
         # Process the query
         query_tokens = self._tokenize(query)
+
+        # Narrow the corpus to the filtered slice before scoring
+        if entry_type or language or tags or id_prefix:
+            if candidate_mask is None:
+                candidate_mask = self._filter_mask(entry_type, language, tags, id_prefix)
+            candidates = self._iter_mask(candidate_mask)
+        else:
+            candidates = self.knowledge_base
         
         # Calculate scores for entries
         scored_entries = []
-        for entry in self.knowledge_base:
+        for entry in candidates:
             score = self._calculate_relevance_score(entry, query_tokens)
             if score > 0:  # Only include entries with a positive score
                 scored_entries.append((entry, score))
@@ -238,7 +470,7 @@ class ConversationQueryTool(BaseTool):
                 oldest_query = next(iter(self._query_cache))
                 del self._query_cache[oldest_query]
                 
-            self._query_cache[query] = relevant_entries
+            self._query_cache[cache_key] = relevant_entries
             
         return relevant_entries
 
@@ -308,12 +540,23 @@ class ConversationQueryTool(BaseTool):
         
         return result
 
-    def _run(self, query: str) -> str:
+    def _run(
+        self,
+        query: str,
+        entry_type: Optional[str] = None,
+        language: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        id_prefix: Optional[str] = None,
+    ) -> str:
         """
         Execute the tool with the given query.
         
         Args:
             query (str): The search query
+            entry_type (Optional[str]): Entry type to restrict results to
+            language (Optional[str]): Language code to restrict results to
+            tags (Optional[List[str]]): Tags that every result must carry
+            id_prefix (Optional[str]): ID prefix to restrict results to
             
         Returns:
             str: The search results formatted as a string
@@ -326,8 +569,36 @@ class ConversationQueryTool(BaseTool):
             processed_query = self._preprocess_query(query)
             logger.info(f"Searching knowledge base for: {processed_query}")
             
+            entry_type, language, tag_filter, id_prefix = self._normalize_filters(entry_type, language, tags, id_prefix)
+            filters = {
+                'entry_type': entry_type,
+                'language': language,
+                'tags': list(tag_filter) if tag_filter else None,
+                'id_prefix': id_prefix,
+            }
+            active_filters = {name: value for name, value in filters.items() if value}
+
+            # Evaluate the filters once; if they exclude everything there is nothing to score
+            candidate_mask = None
+            if active_filters:
+                self._refresh_indexes()
+                candidate_mask = self._filter_mask(entry_type, language, tag_filter, id_prefix)
+                if candidate_mask == 0:
+                    filter_list = ", ".join(f"{name}={value!r}" for name, value in active_filters.items())
+                    return (
+                        f"No entries in the knowledge base match the filters ({filter_list}). "
+                        "Relax or remove these filters rather than rewording the query."
+                    )
+            
             # Search the knowledge base
-            relevant_entries = self._search_knowledge_base(processed_query)
+            relevant_entries = self._search_knowledge_base(
+                processed_query,
+                entry_type=entry_type,
+                language=language,
+                tags=tag_filter,
+                id_prefix=id_prefix,
+                candidate_mask=candidate_mask,
+            )
             
             if not relevant_entries:
                 return "No relevant entries found for your query in the knowledge base."
@@ -386,4 +657,10 @@ if __name__ == '__main__':
     print(tool._run(query="unknown_topic"))
 
     print("\n--- Searching for 'empathy':")
-    print(tool._run(query="empathy"))
\ No newline at end of file
+    print(tool._run(query="empathy"))
+
+    print("\n--- Searching for 'refund' (filtered to billing conversations):")
+    print(tool._run(query="refund", entry_type="conversation_example", tags=["billing"]))
+
+    print("\n--- Searching for 'language' (filtered to guidelines):")
+    print(tool._run(query="language", entry_type="guideline", language="en"))
\ No newline at end of file
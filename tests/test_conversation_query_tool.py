@@ -0,0 +1,138 @@
+import os
+import re
+
+import pytest
+
+from customer_support_crew.tools.conversation_query_tool import ConversationQueryTool
+
+DATASET_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "sample_conversations.json")
+
+CONVERSATION_IDS = {"conv_en_001", "conv_en_002", "conv_en_003", "conv_en_004"}
+
+
+@pytest.fixture
+def tool():
+    return ConversationQueryTool(dataset_path=os.path.abspath(DATASET_PATH))
+
+
+def result_ids(output):
+    return re.findall(r"\(ID: ([^)]+)\)", output)
+
+
+def search_ids(tool, query, **filters):
+    return [entry["id"] for entry in tool._search_knowledge_base(query, **filters)]
+
+
+@pytest.mark.parametrize("query", ["refund", "product", "login password", "guideline language", "conversation billing"])
+def test_unfiltered_search_matches_full_scan(tool, query):
+    query_tokens = tool._tokenize(query)
+    scored = [(entry, tool._calculate_relevance_score(entry, query_tokens)) for entry in tool.knowledge_base]
+    expected = [entry["id"] for entry, score in sorted(scored, key=lambda x: x[1], reverse=True) if score > 0]
+
+    assert search_ids(tool, query) == expected
+
+
+def test_entry_type_filter_restricts_run_output(tool):
+    unfiltered = result_ids(tool._run(query="product"))
+    guidelines = result_ids(tool._run(query="product", entry_type="guideline"))
+    conversations = result_ids(tool._run(query="product", entry_type="conversation_example"))
+
+    assert set(unfiltered) & CONVERSATION_IDS
+    assert guidelines and not set(guidelines) & CONVERSATION_IDS
+    assert conversations == ["conv_en_003"]
+
+
+def test_filters_are_anded(tool):
+    assert result_ids(tool._run(query="billing", entry_type="conversation_example", language="en", tags=["billing"])) == [
+        "conv_en_001",
+        "conv_en_004",
+    ]
+    assert result_ids(tool._run(query="billing", tags=["billing", "refund"])) == ["conv_en_001"]
+    assert "tags=['billing']" in tool._run(query="billing", entry_type="guideline", tags=["billing"])
+
+
+def test_tags_match_whole_values_case_insensitively(tool):
+    assert result_ids(tool._run(query="refund", tags=["Credit Card"])) == ["conv_en_001"]
+    assert result_ids(tool._run(query="refund", tags=["REFUND"])) == ["conv_en_001"]
+    assert "tags=['credit']" in tool._run(query="refund", tags=["credit"])
+
+
+def test_language_filter_restricts_run_output(tool):
+    assert result_ids(tool._run(query="refund", language="EN")) == result_ids(tool._run(query="refund"))
+    assert "language='fr'" in tool._run(query="refund", language="fr")
+
+
+def test_id_prefix_filter_restricts_run_output(tool):
+    assert result_ids(tool._run(query="billing", id_prefix="CONV_EN_00")) == ["conv_en_001", "conv_en_004"]
+    assert result_ids(tool._run(query="product", id_prefix="guide_en_00")) == result_ids(
+        tool._run(query="product", entry_type="guideline")
+    )
+    assert "id_prefix='faq_'" in tool._run(query="refund", id_prefix="faq_")
+
+
+def test_filters_excluding_everything_are_reported(tool):
+    result = tool._run(query="refund", language="fr", tags=["billing"])
+
+    assert result.startswith("No entries in the knowledge base match the filters")
+    assert "language='fr'" in result
+    assert "tags=['billing']" in result
+
+
+def test_no_keyword_hits_within_filters_uses_generic_message(tool):
+    result = tool._run(query="zzzz", entry_type="guideline")
+    assert result == "No relevant entries found for your query in the knowledge base."
+
+
+def test_cache_separates_filtered_and_unfiltered_results(tool):
+    unfiltered = tool._search_knowledge_base("product")
+    filtered = tool._search_knowledge_base("product", entry_type="guideline")
+
+    assert {entry["type"] for entry in unfiltered} == {"conversation_example", "guideline"}
+    assert {entry["type"] for entry in filtered} == {"guideline"}
+    assert {entry["type"] for entry in tool._search_knowledge_base("product")} == {"conversation_example", "guideline"}
+
+
+def test_equivalent_filters_share_a_cache_entry(tool):
+    first = tool._search_knowledge_base("refund", language="EN", tags=("billing", "refund"))
+    second = tool._search_knowledge_base("refund", language="en", tags=("REFUND", "Billing"))
+
+    assert [entry["id"] for entry in first] == ["conv_en_001"]
+    assert second is first
+
+
+def test_reassigning_knowledge_base_rebuilds_indexes(tool):
+    assert search_ids(tool, "billing", tags=("billing",))
+
+    tool.knowledge_base = [entry for entry in tool.knowledge_base if entry["type"] == "guideline"]
+
+    assert search_ids(tool, "billing", tags=("billing",)) == []
+    assert "tags=['billing']" in tool._run(query="billing", tags=["billing"])
+
+
+def test_appending_to_knowledge_base_rebuilds_indexes(tool):
+    tool._run(query="refund", tags=["billing"])
+    tool.knowledge_base.append(
+        {
+            "id": "conv_en_999",
+            "type": "conversation_example",
+            "language": "en",
+            "tags": ["billing"],
+            "summary": "User asked for a refund of a duplicate charge.",
+            "log": "User: I was charged twice, can I get a refund?",
+        }
+    )
+
+    assert "conv_en_999" in search_ids(tool, "refund")
+    assert "conv_en_999" in search_ids(tool, "refund", tags=("billing",))
+    assert "conv_en_999" in result_ids(tool._run(query="refund", tags=["billing"], id_prefix="conv_en_9"))
+
+
+@pytest.mark.parametrize("content", ["[1, 2]", '{"id": "conv_en_001"}', '["a", {"id": "x"}]'])
+def test_malformed_dataset_loads_as_empty(tmp_path, content):
+    dataset = tmp_path / "dataset.json"
+    dataset.write_text(content, encoding="utf-8")
+
+    tool = ConversationQueryTool(dataset_path=str(dataset))
+
+    assert tool.knowledge_base == []
+    assert tool._run(query="refund") == "Knowledge base is not loaded or is empty."